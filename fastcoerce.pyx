@@ -0,0 +1,60 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled coerce_value shared by the CSV loaders.
+
+Same results as the pure-Python coerce_cell in mongo_ingest.py, which it
+replaces once built, but the digit scan runs as a C loop over the
+string's code points and int/float construction goes straight to the
+CPython C API.
+
+Build it (Cython from the `fastcoerce` extra, plus a C compiler) with:
+  poetry run cythonize -i fastcoerce.pyx
+"""
+
+_NULL_TOKENS = frozenset({"NULL", "N/A", "NA", "NONE"})
+# Characters of the inf/nan spellings float() accepts (besides signs/space)
+_NUMERIC_CHARS = frozenset("0123456789+-._eE,infatyINFATY \t\n\r\x0b\x0c")
+
+
+cpdef object coerce_value(object v, bint null_tokens=False):
+    """
+    Empty -> None; plain digits without a leading zero -> int;
+    anything float() accepts once thousands commas are removed -> float;
+    otherwise the stripped string. With null_tokens, NULL/N/A/NA/NONE -> None.
+    """
+    if v is None:
+        return None
+
+    cdef str s = (<str>v).strip()
+    cdef Py_ssize_t n = len(s)
+    cdef Py_ssize_t i
+    cdef Py_UCS4 c
+    cdef bint all_digits = True
+
+    if n == 0:
+        return None
+    if null_tokens and n <= 4 and s.upper() in _NULL_TOKENS:
+        return None
+
+    # float() only accepts strings that start with a digit, sign, "." or ","
+    # (all below ":"), spell inf/nan, or start non-ASCII; other text is
+    # returned here instead of paying for a failed float()
+    c = s[0]
+    if u":" <= c < 128 and (
+        c not in u"iInN" or not _NUMERIC_CHARS.issuperset(s)
+    ):
+        return s
+
+    for i in range(n):
+        c = s[i]
+        if c < u"0" or c > u"9":
+            # Non-ASCII digits still count, matching str.isdigit()
+            all_digits = c > 127 and s.isdigit()
+            break
+
+    try:
+        if all_digits and not (n > 1 and s[0] == u"0"):
+            return int(s)
+        return float(s.replace(",", "") if "," in s else s)
+    except ValueError:
+        return s
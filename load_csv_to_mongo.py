@@ -4,11 +4,15 @@ Load CSV into a MongoDB collection.
 
 Features:
 - Streams the CSV (no need to load whole file into memory)
+- Coerces each batch column by column; rows are built only at insert time
 - Converts empty strings to None
 - Tries to parse ints/floats automatically
 - Optional: normalize column names to snake_case (spaces -> underscores, lowercased)
 - Batched inserts with progress logging
+- Inserts overlap with parsing via an asyncio pipeline (--sync to disable)
+  or an optional process pool (--workers)
 - Works with .csv or .csv.gz
+- Optional pyarrow engine for block-wise, typed parsing (--engine pyarrow)
 
 Usage:
   python load_pluto_csv_to_mongo.py \
@@ -22,76 +26,182 @@ Usage:
 """
 
 import argparse
+import asyncio
 import csv
-import gzip
-import io
+import functools
+import json
 import logging
 import os
 import re
-from typing import Any, Dict, Iterable, List
+import time
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
 
 from dotenv import load_dotenv
-from pymongo import InsertOne, MongoClient
+
+from mongo_ingest import (
+    HAS_PYARROW,
+    MAX_SPECIALIZED_COLUMNS,
+    client_options,
+    coerce_cell,
+    get_client,
+    insert_batches,
+    insert_batches_async,
+    open_maybe_gzip,
+    read_arrow_csv,
+)
+
+# Like coerce_value, which keeps "NA" etc. as text, only empty cells are null
+ARROW_NULL_VALUES = [""]
 
 # ------------------------
 # Helpers
 # ------------------------
 
 
+_NON_WORD_OR_SPACE = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
 def normalize_key(k: str) -> str:
     k = k.strip().lower()
-    k = re.sub(r"[^\w\s]", "", k)
-    k = re.sub(r"\s+", "_", k)
+    k = _NON_WORD_OR_SPACE.sub("", k)
+    k = _WHITESPACE.sub("_", k)
     return k
 
 
-def coerce_value(v: str) -> Any:
-    if v is None or v.strip() == "":
-        return None
-    v = v.strip()
+# Cell values repeat a lot (boroughs, zoning codes, flags): cache their typed values
+coerce_value = functools.lru_cache(maxsize=1 << 16)(coerce_cell)
 
-    try:
-        if v.isdigit() and not (len(v) > 1 and v.startswith("0")):
-            return int(v)
-        return float(v.replace(",", ""))
-    except ValueError:
-        return v
-
-
-def open_maybe_gzip(path: str, encoding: str = "utf-8") -> io.TextIOBase:
-    return (
-        io.TextIOWrapper(gzip.open(path, "rb"), encoding=encoding)
-        if path.endswith(".gz")
-        else open(path, "r", encoding=encoding)
+
+# One batch in column form: ({column name: values}, row count)
+ColumnBatch = Tuple[Dict[str, List[Any]], int]
+
+# A whole column of plain non-negative integers, joined with ","
+_PLAIN_INT_COLUMN = re.compile(r"(?:0|[1-9][0-9]*)(?:,(?:0|[1-9][0-9]*))*")
+
+
+def coerce_column(values: Sequence[str]) -> List[Any]:
+    """
+    Coerce one column of a batch. Integer-only columns are recognised with a
+    single regex pass and converted with int(); anything else maps the cached
+    coerce_value over the column.
+    """
+    joined = ",".join(values)
+    if joined.count(",") == len(values) - 1 and _PLAIN_INT_COLUMN.fullmatch(joined):
+        return list(map(int, values))
+    return list(map(coerce_value, values))
+
+
+@functools.lru_cache(maxsize=None)
+def _docs_builder(
+    keys: Tuple[str, ...],
+) -> Callable[[Iterable[Tuple[Any, ...]]], List[Dict[str, Any]]]:
+    """
+    Compile `build(rows)` for one header: each row tuple is unpacked into
+    locals and placed in a dict display with the keys baked in, e.g.
+      [{'a': v0, 'b': v1} for v0, v1, in rows]
+    so no per-row zip()/dict() call is made. Wide headers use dict(zip()).
+    """
+    if not keys or len(keys) > MAX_SPECIALIZED_COLUMNS:
+        return lambda rows: [dict(zip(keys, vals)) for vals in rows]
+
+    names = [f"v{i}" for i in range(len(keys))]
+    items = ", ".join(f"{k!r}: {v}" for k, v in zip(keys, names))
+    src = (
+        f"def build(rows):\n    return [{{{items}}} for {', '.join(names)}, in rows]\n"
     )
+    namespace: Dict[str, Any] = {}
+    exec(compile(src, "<csv header>", "exec"), namespace)
+    return namespace["build"]
+
+
+def columns_to_docs(columns: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Transpose a column batch into the row documents Mongo expects."""
+    return _docs_builder(tuple(columns))(zip(*columns.values()))
 
 
-def read_csv_rows(
-    csv_path: str, normalize_keys: bool = False, encoding: str = "utf-8"
-) -> Iterable[Dict[str, Any]]:
+def read_csv_columns(
+    csv_path: str,
+    normalize_keys: bool = False,
+    encoding: str = "utf-8",
+    batch_size: int = 5000,
+) -> Iterable[ColumnBatch]:
     with open_maybe_gzip(csv_path, encoding=encoding) as f:
-        reader = csv.DictReader(f)
-        if reader.fieldnames is None:
+        reader = csv.reader(f)
+        headers = next(reader, None)
+        if headers is None:
             raise ValueError("Missing CSV headers")
 
-        field_map = {
-            name: normalize_key(name) if normalize_keys else name
-            for name in reader.fieldnames
-        }
+        keys = [normalize_key(h) if normalize_keys else h for h in headers]
+        n = len(keys)
 
+        def coerce_rows(rows: List[List[str]]) -> Dict[str, List[Any]]:
+            return {k: coerce_column(col) for k, col in zip(keys, zip(*rows))}
+
+        rows: List[List[str]] = []
         for row in reader:
-            yield {field_map[k]: coerce_value(v) for k, v in row.items()}
+            if not row:
+                continue
+            if len(row) != n:
+                row = (row + [""] * n)[:n]
+            rows.append(row)
+            if len(rows) >= batch_size:
+                yield coerce_rows(rows), len(rows)
+                rows.clear()
+        if rows:
+            yield coerce_rows(rows), len(rows)
+
+
+def read_csv_columns_arrow(
+    csv_path: str,
+    normalize_keys: bool = False,
+    encoding: str = "utf-8",
+    batch_size: int = 5000,
+) -> Iterable[ColumnBatch]:
+    """
+    Like read_csv_columns, but pyarrow parses the file block by block and
+    all-numeric columns are cast in one step (see mongo_ingest.read_arrow_csv).
+    """
+    with open_maybe_gzip(csv_path, encoding=encoding) as f:
+        headers = next(csv.reader(f), None)
+    if headers is None:
+        raise ValueError("Missing CSV headers")
+
+    keys = [normalize_key(h) if normalize_keys else h for h in headers]
+    for columns, n in read_arrow_csv(
+        csv_path,
+        headers,
+        coerce_value,
+        encoding=encoding,
+        null_values=ARROW_NULL_VALUES,
+        batch_size=batch_size,
+    ):
+        yield dict(zip(keys, columns)), n
+
+
+# ------------------------
+# Mongo writers
+# ------------------------
 
 
-def batch(iterable: Iterable[Dict[str, Any]], n: int) -> Iterable[List[Dict[str, Any]]]:
-    buf = []
-    for item in iterable:
-        buf.append(item)
-        if len(buf) >= n:
-            yield buf
-            buf = []
-    if buf:
-        yield buf
+def parse_index_specs(raw: str) -> List[List[Tuple[str, Any]]]:
+    """
+    Parse --indexes: a JSON list whose items are a field name (ascending
+    index) or an object of field -> direction/type, e.g.
+    '["bbl", {"borough": 1, "block": 1}, {"geometry": "2dsphere"}]'.
+    """
+    specs = json.loads(raw)
+    if not isinstance(specs, list):
+        raise ValueError("expected a JSON list")
+    keys: List[List[Tuple[str, Any]]] = []
+    for spec in specs:
+        if isinstance(spec, str):
+            keys.append([(spec, 1)])
+        elif isinstance(spec, dict) and spec:
+            keys.append(list(spec.items()))
+        else:
+            raise ValueError(f"Invalid index spec: {spec!r}")
+    return keys
 
 
 # ------------------------
@@ -118,7 +228,49 @@ def main():
         "--drop", action="store_true", help="Drop existing collection before loading"
     )
     parser.add_argument("--encoding", default="utf-8", help="CSV file encoding")
+    parser.add_argument(
+        "--indexes",
+        help='JSON list of indexes to build after loading, e.g. \'["bbl", '
+        '{"borough": 1, "block": 1}]\'',
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["stdlib", "pyarrow"],
+        default="stdlib",
+        help="CSV parser: stdlib csv module or pyarrow (default: stdlib)",
+    )
+    parser.add_argument(
+        "--compressors",
+        default="zstd,snappy,zlib",
+        help="Wire compressors to offer, in order of preference "
+        "(default: zstd,snappy,zlib; unavailable ones are skipped)",
+    )
+    parser.add_argument(
+        "--write-concern",
+        default="1",
+        help="Write concern w, e.g. 1 or majority (default: 1). "
+        "0 is fastest but unacknowledged; only use it for trusted bulk loads",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Insert worker processes; above 1 a process pool replaces the "
+        "asyncio pipeline (default: 1)",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Insert each batch inline before parsing the next, instead of the "
+        "asyncio pipeline",
+    )
     args = parser.parse_args()
+    try:
+        index_keys = parse_index_specs(args.indexes) if args.indexes else []
+    except ValueError as e:
+        parser.error(f"--indexes: {e}")
+    if args.engine == "pyarrow" and not HAS_PYARROW:
+        parser.error("--engine pyarrow requires the pyarrow package")
 
     mongo_uri = os.getenv("MONGO_URI")
     if not mongo_uri:
@@ -130,7 +282,13 @@ def main():
         level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s"
     )
 
-    client = MongoClient(mongo_uri)
+    options = client_options(args.compressors, args.write_concern)
+    if options["w"] == 0:
+        logging.warning(
+            "Write concern 0: inserts are unacknowledged, failed writes are not "
+            "reported and counts below are documents sent"
+        )
+    client = get_client(mongo_uri, options)
     db = client[args.db]
     coll = db[args.collection]
 
@@ -138,20 +296,42 @@ def main():
         logging.info("Dropping collection: %s.%s", args.db, args.collection)
         coll.drop()
 
+    read_columns = (
+        read_csv_columns_arrow if args.engine == "pyarrow" else read_csv_columns
+    )
     total_inserted = 0
     logging.info("Loading from %s into %s.%s", args.csv, args.db, args.collection)
 
-    for i, rows in enumerate(
-        batch(
-            read_csv_rows(args.csv, args.normalize_keys, args.encoding), args.batch_size
-        ),
-        start=1,
-    ):
-        result = coll.bulk_write([InsertOne(doc) for doc in rows], ordered=False)
-        total_inserted += result.inserted_count
-        logging.info(
-            "Batch %d inserted %d (total %d)", i, result.inserted_count, total_inserted
+    doc_batches = (
+        columns_to_docs(columns)
+        for columns, _ in read_columns(
+            args.csv, args.normalize_keys, args.encoding, args.batch_size
+        )
+    )
+    if not args.sync and args.workers <= 1:
+        _, total_inserted = asyncio.run(
+            insert_batches_async(
+                doc_batches, mongo_uri, args.db, args.collection, options=options
+            )
         )
+    else:
+        for i, inserted in insert_batches(
+            doc_batches,
+            mongo_uri,
+            args.db,
+            args.collection,
+            workers=args.workers,
+            options=options,
+        ):
+            total_inserted += inserted
+            logging.info("Batch %d inserted %d (total %d)", i, inserted, total_inserted)
+
+    # Indexes are built once the data is in, rather than maintained per insert
+    for keys in index_keys:
+        logging.info("Building index %s", keys)
+        started = time.perf_counter()
+        coll.create_index(keys)
+        logging.info("Index built in %.1fs", time.perf_counter() - started)
 
     logging.info("✅ Done. Inserted total of %d documents.", total_inserted)
 
@@ -4,10 +4,14 @@ Load GeoJSON into a MongoDB collection.
 
 Features:
 - Reads .geojson/.json (optionally .gz)
+- Streams FeatureCollections with ijson and NDJSON with orjson when installed
 - Accepts Feature, FeatureCollection, [Feature, ...], or NDJSON (one JSON per line)
 - Optional: move Feature.properties to root (flatten) or keep under "properties"
 - Creates 2dsphere index on the geometry field (default: "geometry")
+- Optional hashed sharding with a pre-split empty collection (--sharded)
 - Batching and progress logs
+- Inserts overlap with parsing via an asyncio pipeline (--sync to disable)
+  or an optional process pool (--workers)
 - Loads MONGO_URI from .env (python-dotenv) with CLI override
 
 Usage:
@@ -28,15 +32,27 @@ Env file (.env):
 """
 
 import argparse
-import gzip
+import asyncio
+import codecs
 import io
 import json
 import logging
 import os
-from typing import Any, Dict, Iterable, List, Optional
-
-from pymongo import InsertOne, MongoClient
-from pymongo.errors import BulkWriteError
+from typing import Any, Dict, Iterable, Optional
+
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from mongo_ingest import (
+    TARGET_BATCH_BYTES,
+    batch_iter,
+    client_options,
+    create_geo_index,
+    get_client,
+    insert_batches,
+    insert_batches_async,
+    open_maybe_gzip,
+)
 
 # Try to load dotenv if available
 try:
@@ -46,11 +62,20 @@ try:
 except Exception:
     _HAS_DOTENV = False
 
+# Optional faster JSON: orjson decodes NDJSON lines, ijson streams big documents
+try:
+    import orjson  # type: ignore
+
+    _json_loads = orjson.loads
+except Exception:
+    _json_loads = json.loads
+
+try:
+    import ijson  # type: ignore
 
-def open_maybe_gzip(path: str, encoding: str = "utf-8") -> io.TextIOBase:
-    if path.lower().endswith(".gz"):
-        return io.TextIOWrapper(gzip.open(path, "rb"), encoding=encoding, newline="")
-    return open(path, "r", encoding=encoding, newline="")
+    _HAS_IJSON = True
+except Exception:
+    _HAS_IJSON = False
 
 
 def is_feature(obj: Dict[str, Any]) -> bool:
@@ -101,6 +126,106 @@ def normalize_feature(
     return doc
 
 
+def _normalize_features(
+    feats: Iterable[Any],
+    geometry_field: str,
+    flatten_properties: bool,
+    keep_id: bool,
+    features_only: bool = False,
+) -> Iterable[Dict[str, Any]]:
+    """
+    normalize_feature over many features with the per-feature calls inlined.
+    A member that is not a Feature raises ValueError, or is skipped when
+    features_only is set (bare arrays of mixed objects).
+    """
+    gf = geometry_field
+    for feat in feats:
+        if not (feat.__class__ is dict and feat.get("type") == "Feature"):
+            if features_only:
+                continue
+            raise ValueError("Object is not a GeoJSON Feature")
+
+        doc = {gf: feat.get("geometry")}
+        props = feat.get("properties") or {}
+        if flatten_properties and props.__class__ is dict:
+            doc.update(props)
+        else:
+            doc["properties"] = props
+        if keep_id and "id" in feat:
+            doc["_feature_id"] = feat["id"]
+        yield doc
+
+
+def _utf8_bytes(f: io.TextIOBase) -> Optional[io.BufferedIOBase]:
+    """Underlying byte stream of `f` if it is UTF-8 text, else None."""
+    encoding = getattr(f, "encoding", None) or "utf-8"
+    if codecs.lookup(encoding).name != "utf-8":
+        return None
+    return getattr(f, "buffer", None)
+
+
+# How much of a JSON document is read up front to find its top-level "type"
+HEAD_BYTES = 1 << 20
+
+
+class _HeadReader:
+    """Bytes already read from `raw` (`head`) followed by the rest of `raw`."""
+
+    def __init__(self, head: bytes, raw: io.BufferedIOBase):
+        self._head = io.BytesIO(head)
+        self._raw = raw
+
+    def read(self, n: int = -1) -> bytes:
+        data = self._head.read(n)
+        if n is None or n < 0:
+            return data + self._raw.read()
+        return data or self._raw.read(n)
+
+
+def _read_head(raw: io.BufferedIOBase, n: int) -> bytes:
+    """Up to `n` bytes of `raw`, fewer only at EOF (pipes can return short reads)."""
+    chunks = []
+    while n > 0:
+        chunk = raw.read(n)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def _top_level_type(head: bytes) -> Optional[str]:
+    """The top-level "type" string of the (possibly cut off) JSON object `head`."""
+    try:
+        for prefix, event, value in ijson.parse(io.BytesIO(head)):
+            if prefix == "type" and event == "string":
+                return value
+    except ijson.JSONError:
+        pass  # head ends mid-document
+    return None
+
+
+def _yield_features_ndjson(lines: Iterable[Any]) -> Iterable[Dict[str, Any]]:
+    # one json object per line
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        obj = _json_loads(line)
+        if obj.__class__ is dict and obj.get("type") == "Feature":
+            yield obj
+        elif is_feature_collection(obj):
+            yield from obj["features"]
+        elif isinstance(obj, list):
+            for feat in obj:
+                if is_feature(feat):
+                    yield feat
+        else:
+            raise ValueError(
+                "NDJSON line is not a Feature/FeatureCollection/array of Features"
+            )
+
+
 def yield_docs_from_geojson_stream(
     f: io.TextIOBase,
     ndjson: bool,
@@ -108,64 +233,97 @@ def yield_docs_from_geojson_stream(
     flatten_properties: bool,
     keep_id: bool,
 ) -> Iterable[Dict[str, Any]]:
+    # orjson/ijson read UTF-8 bytes directly; other encodings stay on text
+    raw = _utf8_bytes(f)
+
     if ndjson:
-        # one json object per line
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            obj = json.loads(line)
-            if is_feature(obj):
-                yield normalize_feature(
-                    obj, geometry_field, flatten_properties, keep_id
-                )
-            elif is_feature_collection(obj):
-                for feat in obj["features"]:
-                    yield normalize_feature(
-                        feat, geometry_field, flatten_properties, keep_id
-                    )
-            elif isinstance(obj, list):
-                for feat in obj:
-                    if is_feature(feat):
-                        yield normalize_feature(
-                            feat, geometry_field, flatten_properties, keep_id
-                        )
-            else:
-                raise ValueError(
-                    "NDJSON line is not a Feature/FeatureCollection/array of Features"
-                )
+        feats = _yield_features_ndjson(raw if raw is not None else f)
+        yield from _normalize_features(
+            feats, geometry_field, flatten_properties, keep_id
+        )
         return
 
-    # Standard JSON / GeoJSON
-    obj = json.load(f)
+    # Standard JSON / GeoJSON: stream arrays and FeatureCollections with
+    # ijson's C builder, one feature at a time; everything else is read whole
+    if raw is not None and _HAS_IJSON:
+        head = _read_head(raw, HEAD_BYTES)
+        raw = _HeadReader(head, raw)
+        first = head.lstrip()[:1]
+        if first == b"[":
+            yield from _normalize_features(
+                ijson.items(raw, "item", use_float=True),
+                geometry_field,
+                flatten_properties,
+                keep_id,
+                features_only=True,
+            )
+            return
+
+        doc_type = _top_level_type(head) if first == b"{" else None
+        if doc_type == "FeatureCollection":
+            streamed = 0
+            for doc in _normalize_features(
+                ijson.items(raw, "features.item", use_float=True),
+                geometry_field,
+                flatten_properties,
+                keep_id,
+            ):
+                streamed += 1
+                yield doc
+            if not streamed:
+                logging.warning("FeatureCollection has no features")
+            return
+        if first == b"{" and doc_type is None and len(head) == HEAD_BYTES:
+            logging.warning(
+                'No top-level "type" in the first %d bytes; '
+                "reading the whole document into memory",
+                len(head),
+            )
+
+    obj = _json_loads(raw.read() if raw is not None else f.read())
     if is_feature(obj):
         yield normalize_feature(obj, geometry_field, flatten_properties, keep_id)
     elif is_feature_collection(obj):
-        for feat in obj["features"]:
-            yield normalize_feature(feat, geometry_field, flatten_properties, keep_id)
+        yield from _normalize_features(
+            obj["features"], geometry_field, flatten_properties, keep_id
+        )
     elif isinstance(obj, list):
-        for feat in obj:
-            if is_feature(feat):
-                yield normalize_feature(
-                    feat, geometry_field, flatten_properties, keep_id
-                )
+        yield from _normalize_features(
+            obj, geometry_field, flatten_properties, keep_id, features_only=True
+        )
     else:
         raise ValueError(
             "Input JSON is not a Feature, FeatureCollection, or array of Features"
         )
 
 
-def batch_iter(
-    iterable: Iterable[Dict[str, Any]], n: int
-) -> Iterable[List[Dict[str, Any]]]:
-    buf: List[Dict[str, Any]] = []
-    for item in iterable:
-        buf.append(item)
-        if len(buf) >= n:
-            yield buf
-            buf = []
-    if buf:
-        yield buf
+def shard_collection(
+    client: MongoClient, db_name: str, coll_name: str, shard_key: str, chunks: int
+) -> None:
+    """
+    Shard the collection on a hashed key. With chunks > 0 the empty collection
+    is pre-split into that many chunks spread evenly over the shards, so the
+    first batches already hit every shard instead of one hot chunk.
+    """
+    ns = f"{db_name}.{coll_name}"
+    cmd: Dict[str, Any] = {"shardCollection": ns, "key": {shard_key: "hashed"}}
+    if chunks > 0:
+        cmd["numInitialChunks"] = chunks
+
+    client.admin.command("enableSharding", db_name)
+    try:
+        client.admin.command(cmd)
+    except OperationFailure as e:
+        if e.code != 23:  # AlreadyInitialized
+            raise
+        logging.info("%s is already sharded; leaving its chunks as they are", ns)
+        return
+    logging.info(
+        "Sharded %s on hashed '%s' (%s initial chunks)",
+        ns,
+        shard_key,
+        chunks if chunks > 0 else "default",
+    )
 
 
 def main():
@@ -203,12 +361,42 @@ def main():
         action="store_true",
         help="Create 2dsphere index on geometry field",
     )
+    parser.add_argument(
+        "--create-index-before",
+        action="store_true",
+        help="With --create-index, build the index before loading instead of "
+        "after (slower, but invalid geometries are rejected per document)",
+    )
     parser.add_argument(
         "--drop", action="store_true", help="Drop the collection before loading"
     )
+    parser.add_argument(
+        "--target-batch-bytes",
+        type=int,
+        default=TARGET_BATCH_BYTES,
+        help="Also cut a batch once its estimated BSON size reaches this many "
+        "bytes; 0 disables (default: 12 MB)",
+    )
     parser.add_argument(
         "--batch-size", type=int, default=5000, help="Bulk insert batch size"
     )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="Shard the collection on a hashed key before loading (mongos only)",
+    )
+    parser.add_argument(
+        "--shard-key",
+        default="_id",
+        help="Field to hash-shard on with --sharded (default: _id)",
+    )
+    parser.add_argument(
+        "--pre-split-ranges",
+        type=int,
+        default=0,
+        help="With --sharded, number of initial chunks to pre-split the empty "
+        "collection into (default: server default)",
+    )
     parser.add_argument(
         "--ndjson",
         action="store_true",
@@ -217,6 +405,31 @@ def main():
     parser.add_argument(
         "--encoding", default="utf-8", help="File encoding (default: utf-8)"
     )
+    parser.add_argument(
+        "--compressors",
+        default="zstd,snappy,zlib",
+        help="Wire compressors to offer, in order of preference "
+        "(default: zstd,snappy,zlib; unavailable ones are skipped)",
+    )
+    parser.add_argument(
+        "--write-concern",
+        default="1",
+        help="Write concern w, e.g. 1 or majority (default: 1). "
+        "0 is fastest but unacknowledged; only use it for trusted bulk loads",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Insert worker processes; above 1 a process pool replaces the "
+        "asyncio pipeline (default: 1)",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Insert each batch inline before parsing the next, instead of the "
+        "asyncio pipeline",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -230,7 +443,13 @@ def main():
     )
 
     # Connect
-    client = MongoClient(args.mongo_uri)
+    options = client_options(args.compressors, args.write_concern)
+    if options["w"] == 0:
+        logging.warning(
+            "Write concern 0: inserts are unacknowledged, failed writes are not "
+            "reported and counts below are documents sent"
+        )
+    client = get_client(args.mongo_uri, options)
     db = client[args.db]
     coll = db[args.collection]
 
@@ -238,12 +457,16 @@ def main():
         logging.info("Dropping collection %s.%s", args.db, args.collection)
         coll.drop()
 
-    # Optional index
-    if args.create_index:
-        logging.info("Ensuring 2dsphere index on '%s'", args.geometry_field)
-        coll.create_index([(args.geometry_field, "2dsphere")])
+    if args.sharded:
+        shard_collection(
+            client, args.db, args.collection, args.shard_key, args.pre_split_ranges
+        )
+
+    # Optional index; by default it is built once the data is in
+    if args.create_index and args.create_index_before:
+        create_geo_index(coll, args.geometry_field)
 
-    total = 0
+    total = batches = 0
     logging.info(
         "Loading %s into %s.%s (batch=%d, ndjson=%s)",
         args.input,
@@ -254,25 +477,41 @@ def main():
     )
 
     with open_maybe_gzip(args.input, encoding=args.encoding) as f:
+        doc_batches = batch_iter(
+            yield_docs_from_geojson_stream(
+                f,
+                ndjson=args.ndjson,
+                geometry_field=args.geometry_field,
+                flatten_properties=args.flatten_properties,
+                keep_id=args.keep_feature_id,
+            ),
+            args.batch_size,
+            out=[],
+            max_bytes=args.target_batch_bytes,
+        )
         try:
-            for i, docs in enumerate(
-                batch_iter(
-                    yield_docs_from_geojson_stream(
-                        f,
-                        ndjson=args.ndjson,
-                        geometry_field=args.geometry_field,
-                        flatten_properties=args.flatten_properties,
-                        keep_id=args.keep_feature_id,
-                    ),
-                    args.batch_size,
-                ),
-                start=1,
-            ):
-                res = coll.bulk_write([InsertOne(d) for d in docs], ordered=False)
-                total += res.inserted_count
-                logging.info(
-                    "Batch %d inserted %d (total %d)", i, res.inserted_count, total
+            if not args.sync and args.workers <= 1:
+                batches, total = asyncio.run(
+                    insert_batches_async(
+                        doc_batches,
+                        args.mongo_uri,
+                        args.db,
+                        args.collection,
+                        options=options,
+                    )
                 )
+            else:
+                for i, inserted in insert_batches(
+                    doc_batches,
+                    args.mongo_uri,
+                    args.db,
+                    args.collection,
+                    workers=args.workers,
+                    options=options,
+                ):
+                    total += inserted
+                    batches += 1
+                    logging.info("Batch %d inserted %d (total %d)", i, inserted, total)
         except BulkWriteError as bwe:
             logging.error("Bulk write error: %s", bwe.details)
             raise
@@ -280,8 +519,16 @@ def main():
             logging.exception("Failed to load GeoJSON: %s", e)
             raise
 
+    if args.create_index and not args.create_index_before:
+        create_geo_index(coll, args.geometry_field)
+
     logging.info(
-        "Done. Inserted %d documents into %s.%s", total, args.db, args.collection
+        "Done. Inserted %d documents into %s.%s in %d batches (avg %d docs/batch)",
+        total,
+        args.db,
+        args.collection,
+        batches,
+        total // max(batches, 1),
     )
     logging.info(
         "Reminder: MongoDB expects WGS84 coordinates (EPSG:4326) for 2dsphere."
@@ -7,7 +7,10 @@ Features:
 - Optional CRS transform (e.g., EPSG:2263 -> EPSG:4326) for Mongo 2dsphere
 - Streams CSV (supports .csv or .csv.gz; handles quoted multiline WKT)
 - Converts empty strings to None; tries int/float coercion for non-geom columns
+- Optional pyarrow engine for block-wise, typed parsing (--engine pyarrow)
 - Batching + optional drop + 2dsphere index creation
+- Inserts overlap with parsing via an asyncio pipeline (--sync to disable)
+  or an optional process pool (--workers)
 - Reads MONGO_URI from .env (python-dotenv), with CLI override if desired
 
 Usage:
@@ -26,16 +29,34 @@ set --crs-in accordingly and leave --crs-out as EPSG:4326.
 """
 
 import argparse
+import asyncio
 import csv
-import gzip
-import io
+import functools
+import itertools
 import logging
 import os
-from typing import Any, Dict, Iterable, List, Optional
+import re
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-from pymongo import InsertOne, MongoClient
 from pymongo.errors import BulkWriteError
 
+from mongo_ingest import (
+    HAS_PYARROW,
+    MAX_SPECIALIZED_COLUMNS,
+    NULL_TOKENS,
+    TARGET_BATCH_BYTES,
+    batch_iter,
+    client_options,
+    coerce_cell,
+    create_geo_index,
+    get_client,
+    insert_batches,
+    insert_batches_async,
+    open_maybe_gzip,
+    read_arrow_csv,
+)
+
 # Optional .env
 try:
     from dotenv import load_dotenv
@@ -44,49 +65,97 @@ try:
 except Exception:
     _HAS_DOTENV = False
 
+import numpy as np
+import shapely
 from pyproj import CRS, Transformer
 
 # Geometry / CRS
-from shapely import wkt
-from shapely.errors import WKTReadingError
+from shapely.errors import ShapelyError
 from shapely.geometry import mapping
 from shapely.geometry.base import BaseGeometry
 
-
-def open_maybe_gzip(path: str, encoding: str = "utf-8") -> io.TextIOBase:
-    if path.lower().endswith(".gz"):
-        return io.TextIOWrapper(gzip.open(path, "rb"), encoding=encoding, newline="")
-    return open(path, "r", encoding=encoding, newline="")
+# Every capitalization of the tokens coerce_value treats as null
+ARROW_NULL_VALUES = [""] + sorted(
+    "".join(cased)
+    for token in NULL_TOKENS
+    for cased in itertools.product(*({c.lower(), c.upper()} for c in token))
+)
 
 
-def coerce_value(v: Optional[str]) -> Any:
-    if v is None:
-        return None
-    v = v.strip()
-    if v == "" or v.upper() in {"NULL", "N/A", "NA", "NONE"}:
-        return None
-    # Try int
-    if v.isdigit() and not (len(v) > 1 and v[0] == "0"):
-        try:
-            return int(v)
-        except Exception:
-            pass
-    # Try float (remove thousands commas)
-    try:
-        return float(v.replace(",", ""))
-    except Exception:
-        return v
+# Cell values repeat a lot (zone codes, flags): cache their typed values
+coerce_value = functools.lru_cache(maxsize=1 << 16)(
+    functools.partial(coerce_cell, null_tokens=True)
+)
 
 
-def parse_wkt(geom_wkt: str) -> BaseGeometry:
+def parse_wkts(raw_wkts: List[str], repair: bool = True) -> np.ndarray:
+    """Parse a batch of WKT strings into an array of shapely geometries."""
     try:
-        geom = wkt.loads(geom_wkt)
-        # Attempt simple validity fix (self-intersections)
-        if not geom.is_valid:
-            geom = geom.buffer(0)
-        return geom
-    except WKTReadingError as e:
+        geoms = shapely.from_wkt(np.array(raw_wkts, dtype=object))
+    except ShapelyError as e:
         raise ValueError(f"Invalid WKT geometry: {e}") from e
+    if not repair:
+        return geoms
+    # Attempt simple validity fix (self-intersections)
+    invalid = ~shapely.is_valid(geoms)
+    if invalid.any():
+        geoms[invalid] = shapely.buffer(geoms[invalid], 0)
+    return geoms
+
+
+_WKT_PUNCT = re.compile(r"\s*([(),])\s*")
+
+
+def _wkt_positions(text: str) -> Tuple[Tuple[float, float], ...]:
+    positions = []
+    for point in text.split(","):
+        x, y = point.split()
+        positions.append((float(x), float(y)))
+    return tuple(positions)
+
+
+def _wkt_ring(text: str) -> Tuple[Tuple[float, float], ...]:
+    """Positions of a linear ring: closed, with at least 4 positions."""
+    ring = _wkt_positions(text)
+    if len(ring) < 4 or ring[0] != ring[-1]:
+        raise ValueError("not a closed linear ring")
+    return ring
+
+
+def fast_wkt_to_geojson(raw_wkt: str) -> Optional[Dict[str, Any]]:
+    """
+    Convert 2D POINT/POLYGON/MULTIPOLYGON WKT straight to GeoJSON without
+    shapely. No validity repair is done. Returns None for anything else
+    (other types, Z/M, EMPTY, malformed text) so the caller can fall back.
+    """
+    text = _WKT_PUNCT.sub(r"\1", raw_wkt.strip())
+    head, sep, body = text.partition("(")
+    if not sep or not body.endswith(")"):
+        return None
+    body = body[:-1]
+    kind = head.upper()
+    try:
+        if kind == "POINT":
+            (position,) = _wkt_positions(body)
+            return {"type": "Point", "coordinates": position}
+        if kind == "POLYGON" and body.startswith("(") and body.endswith(")"):
+            rings = body[1:-1].split("),(")
+            return {
+                "type": "Polygon",
+                "coordinates": tuple(_wkt_ring(r) for r in rings),
+            }
+        if kind == "MULTIPOLYGON" and body.startswith("((") and body.endswith("))"):
+            polygons = body[2:-2].split(")),((")
+            return {
+                "type": "MultiPolygon",
+                "coordinates": [
+                    tuple(_wkt_ring(r) for r in polygon.split("),("))
+                    for polygon in polygons
+                ],
+            }
+    except ValueError:
+        return None
+    return None
 
 
 def geom_to_geojson(geom: BaseGeometry) -> Dict[str, Any]:
@@ -94,36 +163,130 @@ def geom_to_geojson(geom: BaseGeometry) -> Dict[str, Any]:
     return mapping(geom)
 
 
-def reproject_geometry(geom: BaseGeometry, src_crs: str, dst_crs: str) -> BaseGeometry:
-    if src_crs == dst_crs:
-        return geom
-    transformer = Transformer.from_crs(
+# Raw WKT -> reprojected GeoJSON, so repeated small geometries (points, tiny
+# shapes) are parsed once. Unique parcel polygons never repeat, so only short
+# WKT is cached, in a bounded LRU (~16k entries of a few hundred bytes each).
+_GEOJSON_CACHE: OrderedDict[Tuple[str, str, str, bool], Dict[str, Any]] = OrderedDict()
+GEOJSON_CACHE_MAX_ENTRIES = 1 << 14
+GEOJSON_CACHE_MAX_WKT_LEN = 256
+
+
+def wkts_to_geojson(
+    raw_wkts: List[str], crs_in: str, crs_out: str, skip_validity: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Convert a batch of WKT strings to reprojected GeoJSON dicts.
+    Cache misses are parsed, repaired and reprojected together as one array.
+    With skip_validity and no reprojection, simple types skip shapely entirely.
+    """
+    fast = skip_validity and crs_in == crs_out
+    results: List[Optional[Dict[str, Any]]] = []
+    misses: List[int] = []
+    for i, raw_wkt in enumerate(raw_wkts):
+        if fast:
+            geojson = fast_wkt_to_geojson(raw_wkt)
+            if geojson is not None:
+                results.append(geojson)
+                continue
+        cached = None
+        if len(raw_wkt) <= GEOJSON_CACHE_MAX_WKT_LEN:
+            key = (raw_wkt, crs_in, crs_out, skip_validity)
+            cached = _GEOJSON_CACHE.get(key)
+            if cached is not None:
+                _GEOJSON_CACHE.move_to_end(key)
+        if cached is None:
+            misses.append(i)
+        results.append(cached)
+
+    if misses:
+        geoms = parse_wkts([raw_wkts[i] for i in misses], repair=not skip_validity)
+        geoms = reproject_geometry(geoms, crs_in, crs_out)
+        for i, geom in zip(misses, geoms):
+            geojson = geom_to_geojson(geom)
+            results[i] = geojson
+            raw_wkt = raw_wkts[i]
+            if len(raw_wkt) <= GEOJSON_CACHE_MAX_WKT_LEN:
+                _GEOJSON_CACHE[(raw_wkt, crs_in, crs_out, skip_validity)] = geojson
+                if len(_GEOJSON_CACHE) > GEOJSON_CACHE_MAX_ENTRIES:
+                    _GEOJSON_CACHE.popitem(last=False)
+    return results
+
+
+@functools.lru_cache(maxsize=None)
+def get_transformer(src_crs: str, dst_crs: str) -> Transformer:
+    """Build the transformer once per CRS pair; PROJ setup is expensive."""
+    return Transformer.from_crs(
         CRS.from_user_input(src_crs), CRS.from_user_input(dst_crs), always_xy=True
     )
+
+
+def reproject_geometry(geoms: np.ndarray, src_crs: str, dst_crs: str) -> np.ndarray:
+    if src_crs == dst_crs:
+        return geoms
     # Apply coordinate transform
-    return shapely_transform_coords(geom, transformer)
+    return shapely_transform_coords(geoms, get_transformer(src_crs, dst_crs))
+
 
+def shapely_transform_coords(geoms: np.ndarray, transformer: Transformer) -> np.ndarray:
+    # Transform the vertices of every geometry as arrays in a single PROJ call
+    def transform_xy(coords: np.ndarray) -> np.ndarray:
+        x, y = transformer.transform(coords[:, 0], coords[:, 1])
+        return np.column_stack((x, y))
 
-def shapely_transform_coords(
-    geom: BaseGeometry, transformer: Transformer
-) -> BaseGeometry:
-    # avoid importing shapely.ops.transform directly to keep deps lean
-    from shapely.ops import transform as ops_transform
+    return shapely.transform(geoms, transform_xy)
 
-    return ops_transform(lambda x, y, z=None: transformer.transform(x, y), geom)
 
+def geometry_docs(
+    rows: Iterable[Tuple[str, Dict[str, Any]]],
+    geometry_field: str,
+    crs_in: str,
+    crs_out: str,
+    batch_size: int = 2000,
+    skip_validity: bool = False,
+) -> Iterable[Dict[str, Any]]:
+    """Turn (raw WKT, other fields) rows into documents, batch_size rows at a time."""
+    raw_wkts: List[str] = []
+    props: List[Dict[str, Any]] = []
+
+    def flush() -> Iterable[Dict[str, Any]]:
+        geojsons = wkts_to_geojson(raw_wkts, crs_in, crs_out, skip_validity)
+        for geojson, row in zip(geojsons, props):
+            # Build document: geometry + all other fields
+            doc: Dict[str, Any] = {geometry_field: geojson}
+            doc.update(row)
+            yield doc
 
-def batch_iter(
-    iterable: Iterable[Dict[str, Any]], n: int
-) -> Iterable[List[Dict[str, Any]]]:
-    buf: List[Dict[str, Any]] = []
-    for item in iterable:
-        buf.append(item)
-        if len(buf) >= n:
-            yield buf
-            buf = []
-    if buf:
-        yield buf
+    for raw_wkt, row in rows:
+        raw_wkts.append(raw_wkt)
+        props.append(row)
+        if len(raw_wkts) >= batch_size:
+            yield from flush()
+            raw_wkts.clear()
+            props.clear()
+    if raw_wkts:
+        yield from flush()
+
+
+@functools.lru_cache(maxsize=None)
+def _row_builder(
+    headers: Tuple[str, ...], wkt_field: str
+) -> Callable[[List[str], Callable[[str], Any]], Dict[str, Any]]:
+    """
+    Compile `build(row, c)` for one header: a dict display of every column but
+    the WKT one with the keys baked in, e.g.
+      {'a': c(row[0]), 'b': c(row[2])}
+    so no per-cell key lookup or comprehension step is made. Wide headers use a
+    plain comprehension.
+    """
+    fields = [(i, k) for i, k in enumerate(headers) if k != wkt_field]
+    if len(fields) > MAX_SPECIALIZED_COLUMNS:
+        return lambda row, c: {k: c(row[i]) for i, k in fields}
+
+    items = ", ".join(f"{k!r}: c(row[{i}])" for i, k in fields)
+    src = f"def build(row, c):\n    return {{{items}}}\n"
+    namespace: Dict[str, Any] = {}
+    exec(compile(src, "<csv header>", "exec"), namespace)
+    return namespace["build"]
 
 
 def yield_docs_from_csv(
@@ -133,33 +296,83 @@ def yield_docs_from_csv(
     crs_in: str,
     crs_out: str,
     encoding: str = "utf-8",
+    batch_size: int = 2000,
+    skip_validity: bool = False,
 ) -> Iterable[Dict[str, Any]]:
     with open_maybe_gzip(csv_path, encoding=encoding) as f:
         # csv module handles quoted fields with embedded newlines properly
-        reader = csv.DictReader(f)
-        if not reader.fieldnames:
+        reader = csv.reader(f)
+        headers = next(reader, None)
+        if not headers:
             raise ValueError("CSV appears to have no header row.")
-        if wkt_field not in reader.fieldnames:
+        if wkt_field not in headers:
             raise ValueError(f"WKT field '{wkt_field}' not found in CSV headers.")
 
-        for row in reader:
-            raw_wkt = row.get(wkt_field)
-            if raw_wkt is None or raw_wkt.strip() == "":
-                # Skip rows without geometry
-                continue
+        n = len(headers)
+        wkt_idx = headers.index(wkt_field)
+        build = _row_builder(tuple(headers), wkt_field)
+
+        def wkt_rows() -> Iterable[Tuple[str, Dict[str, Any]]]:
+            for row in reader:
+                if not row:
+                    continue
+                if len(row) < n:
+                    row += [""] * (n - len(row))
+                raw_wkt = row[wkt_idx]
+                if raw_wkt.strip() == "":
+                    # Skip rows without geometry
+                    continue
+                yield raw_wkt, build(row, coerce_value)
+
+        yield from geometry_docs(
+            wkt_rows(), geometry_field, crs_in, crs_out, batch_size, skip_validity
+        )
 
-            # Parse and reproject geometry
-            geom = parse_wkt(raw_wkt)
-            geom = reproject_geometry(geom, crs_in, crs_out)
-            geom_geojson = geom_to_geojson(geom)
 
-            # Build document: geometry + all other fields coerced
-            doc: Dict[str, Any] = {geometry_field: geom_geojson}
-            for k, v in row.items():
-                if k == wkt_field:
+def yield_docs_from_csv_arrow(
+    csv_path: str,
+    wkt_field: str,
+    geometry_field: str,
+    crs_in: str,
+    crs_out: str,
+    encoding: str = "utf-8",
+    batch_size: int = 2000,
+    skip_validity: bool = False,
+) -> Iterable[Dict[str, Any]]:
+    """
+    Like yield_docs_from_csv, but pyarrow parses the file block by block and
+    all-numeric columns are cast in one step (see mongo_ingest.read_arrow_csv).
+    """
+    with open_maybe_gzip(csv_path, encoding=encoding) as f:
+        headers = next(csv.reader(f), None)
+    if not headers:
+        raise ValueError("CSV appears to have no header row.")
+    if wkt_field not in headers:
+        raise ValueError(f"WKT field '{wkt_field}' not found in CSV headers.")
+
+    wkt_idx = headers.index(wkt_field)
+    fields = [(i, k) for i, k in enumerate(headers) if k != wkt_field]
+
+    def wkt_rows() -> Iterable[Tuple[str, Dict[str, Any]]]:
+        for columns, _ in read_arrow_csv(
+            csv_path,
+            headers,
+            coerce_value,
+            encoding=encoding,
+            null_values=ARROW_NULL_VALUES,
+            batch_size=batch_size,
+            raw_columns=(wkt_idx,),
+        ):
+            for row in zip(*columns):
+                raw_wkt = row[wkt_idx]
+                if raw_wkt is None or raw_wkt.strip() == "":
+                    # Skip rows without geometry
                     continue
-                doc[k] = coerce_value(v)
-            yield doc
+                yield raw_wkt, {k: row[i] for i, k in fields}
+
+    yield from geometry_docs(
+        wkt_rows(), geometry_field, crs_in, crs_out, batch_size, skip_validity
+    )
 
 
 def main():
@@ -195,29 +408,81 @@ def main():
         default="EPSG:4326",
         help="Target CRS for Mongo (should be EPSG:4326)",
     )
+    parser.add_argument(
+        "--target-batch-bytes",
+        type=int,
+        default=TARGET_BATCH_BYTES,
+        help="Also cut a batch once its estimated BSON size reaches this many "
+        "bytes; 0 disables (default: 12 MB)",
+    )
     parser.add_argument(
         "--batch-size",
         type=int,
         default=2000,
         help="Bulk insert batch size (default: 2000)",
     )
+    parser.add_argument(
+        "--skip-validity",
+        action="store_true",
+        help="Skip geometry validity repair (buffer(0)); with --crs-in equal to "
+        "--crs-out, simple WKT is converted without shapely",
+    )
     parser.add_argument(
         "--create-index",
         action="store_true",
         help="Create 2dsphere index on geometry field",
     )
+    parser.add_argument(
+        "--create-index-before",
+        action="store_true",
+        help="With --create-index, build the index before loading instead of "
+        "after (slower, but invalid geometries are rejected per document)",
+    )
     parser.add_argument(
         "--drop", action="store_true", help="Drop the collection before loading"
     )
     parser.add_argument(
         "--encoding", default="utf-8", help="CSV encoding (default: utf-8)"
     )
+    parser.add_argument(
+        "--engine",
+        choices=["stdlib", "pyarrow"],
+        default="stdlib",
+        help="CSV parser: stdlib csv module or pyarrow (default: stdlib)",
+    )
+    parser.add_argument(
+        "--compressors",
+        default="zstd,snappy,zlib",
+        help="Wire compressors to offer, in order of preference "
+        "(default: zstd,snappy,zlib; unavailable ones are skipped)",
+    )
+    parser.add_argument(
+        "--write-concern",
+        default="1",
+        help="Write concern w, e.g. 1 or majority (default: 1). "
+        "0 is fastest but unacknowledged; only use it for trusted bulk loads",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Insert worker processes; above 1 a process pool replaces the "
+        "asyncio pipeline (default: 1)",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Insert each batch inline before parsing the next, instead of the "
+        "asyncio pipeline",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
         help="Logging level (DEBUG, INFO, WARNING, ERROR)",
     )
     args = parser.parse_args()
+    if args.engine == "pyarrow" and not HAS_PYARROW:
+        parser.error("--engine pyarrow requires the pyarrow package")
 
     logging.basicConfig(
         level=getattr(logging, args.log_level.upper(), logging.INFO),
@@ -225,7 +490,13 @@ def main():
     )
 
     # Connect
-    client = MongoClient(args.mongo_uri)
+    options = client_options(args.compressors, args.write_concern)
+    if options["w"] == 0:
+        logging.warning(
+            "Write concern 0: inserts are unacknowledged, failed writes are not "
+            "reported and counts below are documents sent"
+        )
+    client = get_client(args.mongo_uri, options)
     db = client[args.db]
     coll = db[args.collection]
 
@@ -234,12 +505,14 @@ def main():
         logging.info("Dropping %s.%s", args.db, args.collection)
         coll.drop()
 
-    # Optional index
-    if args.create_index:
-        logging.info("Ensuring 2dsphere index on '%s'", args.geometry_field)
-        coll.create_index([(args.geometry_field, "2dsphere")])
+    # Optional index; by default it is built once the data is in
+    if args.create_index and args.create_index_before:
+        create_geo_index(coll, args.geometry_field)
 
-    total = 0
+    yield_docs = (
+        yield_docs_from_csv_arrow if args.engine == "pyarrow" else yield_docs_from_csv
+    )
+    total = batches = 0
     logging.info(
         "Loading %s (WKT field: %s, CRS %s -> %s) into %s.%s",
         args.csv,
@@ -250,26 +523,44 @@ def main():
         args.collection,
     )
 
+    doc_batches = batch_iter(
+        yield_docs(
+            args.csv,
+            wkt_field=args.wkt_field,
+            geometry_field=args.geometry_field,
+            crs_in=args.crs_in,
+            crs_out=args.crs_out,
+            encoding=args.encoding,
+            batch_size=args.batch_size,
+            skip_validity=args.skip_validity,
+        ),
+        args.batch_size,
+        out=[],
+        max_bytes=args.target_batch_bytes,
+    )
     try:
-        for i, docs in enumerate(
-            batch_iter(
-                yield_docs_from_csv(
-                    args.csv,
-                    wkt_field=args.wkt_field,
-                    geometry_field=args.geometry_field,
-                    crs_in=args.crs_in,
-                    crs_out=args.crs_out,
-                    encoding=args.encoding,
-                ),
-                args.batch_size,
-            ),
-            start=1,
-        ):
-            res = coll.bulk_write([InsertOne(d) for d in docs], ordered=False)
-            total += res.inserted_count
-            logging.info(
-                "Batch %d inserted %d (total %d)", i, res.inserted_count, total
+        if not args.sync and args.workers <= 1:
+            batches, total = asyncio.run(
+                insert_batches_async(
+                    doc_batches,
+                    args.mongo_uri,
+                    args.db,
+                    args.collection,
+                    options=options,
+                )
             )
+        else:
+            for i, inserted in insert_batches(
+                doc_batches,
+                args.mongo_uri,
+                args.db,
+                args.collection,
+                workers=args.workers,
+                options=options,
+            ):
+                total += inserted
+                batches += 1
+                logging.info("Batch %d inserted %d (total %d)", i, inserted, total)
     except BulkWriteError as bwe:
         logging.error("Bulk write error: %s", bwe.details)
         raise
@@ -277,7 +568,15 @@ def main():
         logging.exception("Failed to load CSV: %s", e)
         raise
 
-    logging.info("Done. Inserted %d documents.", total)
+    if args.create_index and not args.create_index_before:
+        create_geo_index(coll, args.geometry_field)
+
+    logging.info(
+        "Done. Inserted %d documents in %d batches (avg %d docs/batch).",
+        total,
+        batches,
+        total // max(batches, 1),
+    )
     logging.info("Reminder: MongoDB geospatial expects GeoJSON in WGS84 (EPSG:4326).")
 
 
@@ -0,0 +1,464 @@
+"""
+Input and MongoDB ingest helpers shared by the loaders
+(load_csv_to_mongo.py, load_geojson_to_mongo.py, load_wkt_csv_to_mongo.py):
+gzip-aware input, block-wise pyarrow CSV reading, batching, client setup, and the inline / process-pool /
+asyncio insert paths.
+"""
+
+import asyncio
+import csv
+import gzip
+import io
+import logging
+import os
+import shutil
+import subprocess
+import time
+import warnings
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from bson import encode
+from bson.raw_bson import RawBSONDocument
+from pymongo import AsyncMongoClient, MongoClient
+
+# Optional faster gzip (python-isal)
+try:
+    from isal import igzip as _gzip  # type: ignore
+except Exception:
+    _gzip = gzip
+
+# Optional compiled coerce_cell (fastcoerce.pyx, built with `cythonize -i`)
+try:
+    import fastcoerce  # type: ignore
+
+    _HAS_FASTCOERCE = True
+except Exception:
+    _HAS_FASTCOERCE = False
+
+# Only needed by read_arrow_csv, i.e. the loaders' --engine pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+
+    HAS_PYARROW = True
+except Exception:
+    HAS_PYARROW = False
+
+# gzip's default read chunk is small; a larger buffer cuts per-chunk overhead
+GZIP_READ_BUFFER_SIZE = 128 * 1024
+
+# External decompressors, fastest first; each one accepts `-dc` on stdin
+GZIP_TOOLS = ("pigz", "igzip", "gzip")
+GZIP_PIPE_BUFFER_SIZE = 1 << 20
+
+# Bytes of CSV text pyarrow parses per block (--engine pyarrow)
+ARROW_BLOCK_SIZE = 64 << 20
+
+# Past this many columns a generated dict display is no faster than dict(zip())
+# or a plain comprehension (the CSV loaders' per-header row builders)
+MAX_SPECIALIZED_COLUMNS = 40
+
+# asyncio insert pipeline: parsed batches queued ahead, concurrent inserts
+ASYNC_QUEUE_SIZE = 4
+ASYNC_CONSUMERS = 4
+ASYNC_MAX_POOL_SIZE = 16
+
+# Batches are also cut by estimated BSON size, leaving headroom under 16 MB
+TARGET_BATCH_BYTES = 12 * 1024 * 1024
+BATCH_SIZE_SAMPLE_EVERY = 100
+
+
+class _PipeTextReader(io.TextIOWrapper):
+    """Text stream over a decompressor subprocess; reaps the process on close."""
+
+    def __init__(self, proc: subprocess.Popen, encoding: str) -> None:
+        super().__init__(
+            io.BufferedReader(proc.stdout, buffer_size=GZIP_PIPE_BUFFER_SIZE),
+            encoding=encoding,
+            newline="",
+        )
+        self._proc = proc
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        # Exit status only means something if the tool wrote all of its output
+        finished = not self.buffer.peek(1)
+        super().close()
+        if not finished:
+            self._proc.terminate()
+        rc = self._proc.wait()
+        if finished and rc != 0:
+            raise OSError(f"{self._proc.args[0]} -dc exited with status {rc}")
+
+
+def open_maybe_gzip(path: str, encoding: str = "utf-8") -> io.TextIOBase:
+    if path.lower().endswith(".gz"):
+        # Decompress in a separate process so it overlaps with parsing
+        tool = next(filter(None, map(shutil.which, GZIP_TOOLS)), None)
+        if tool:
+            # Open here so missing/unreadable files raise as usual and no path
+            # ever reaches the tool's command line
+            with open(path, "rb") as src:
+                proc = subprocess.Popen(
+                    [tool, "-dc"], stdin=src, stdout=subprocess.PIPE, bufsize=0
+                )
+            return _PipeTextReader(proc, encoding)
+        raw = io.BufferedReader(
+            _gzip.open(path, "rb"), buffer_size=GZIP_READ_BUFFER_SIZE
+        )
+        return io.TextIOWrapper(raw, encoding=encoding, newline="")
+    return open(path, "r", encoding=encoding, newline="")
+
+
+def batch_iter(
+    iterable: Iterable[Dict[str, Any]],
+    n: int,
+    out: Optional[List[Dict[str, Any]]] = None,
+    max_bytes: int = 0,
+) -> Iterable[List[Dict[str, Any]]]:
+    """
+    Group items into lists of n. With max_bytes, a batch is also cut once its
+    estimated BSON size reaches max_bytes, using a running average of every
+    BATCH_SIZE_SAMPLE_EVERY-th item's encoded size. When `out` is given that
+    one list is cleared and refilled for every batch, so consumers must copy
+    what they keep.
+    """
+    buf: List[Dict[str, Any]] = [] if out is None else out
+    limit = n
+    seen = sampled = sampled_bytes = 0
+    for item in iterable:
+        if max_bytes and seen % BATCH_SIZE_SAMPLE_EVERY == 0:
+            sampled += 1
+            sampled_bytes += len(encode(item))
+            capped = min(n, max(1, max_bytes * sampled // sampled_bytes))
+            if capped < n and limit == n:
+                logging.info(
+                    "~%d bytes/doc: cutting batches at %d docs to stay under %d bytes",
+                    sampled_bytes // sampled,
+                    capped,
+                    max_bytes,
+                )
+            limit = capped
+        seen += 1
+
+        buf.append(item)
+        if len(buf) >= limit:
+            yield buf
+            if out is None:
+                buf = []
+            else:
+                buf.clear()
+    if buf:
+        yield buf
+
+
+_CLIENT: Optional[MongoClient] = None
+_CLIENT_PID: Optional[int] = None
+
+
+def client_options(compressors: str, write_concern: str) -> Dict[str, Any]:
+    """MongoClient keyword options for wire compression and write concern."""
+    options: Dict[str, Any] = {
+        "w": int(write_concern) if write_concern.isdigit() else write_concern,
+        "retryWrites": True,
+    }
+    if compressors:
+        options["compressors"] = compressors
+        options["zlibCompressionLevel"] = 3
+    return options
+
+
+def get_client(mongo_uri: str, options: Optional[Dict[str, Any]] = None) -> MongoClient:
+    """Return a MongoClient for this process, creating it once per pid."""
+    global _CLIENT, _CLIENT_PID
+    if _CLIENT is None or _CLIENT_PID != os.getpid():
+        with warnings.catch_warnings():
+            # PyMongo drops compressors whose module isn't installed; that's fine
+            warnings.filterwarnings("ignore", message="Wire protocol compression")
+            _CLIENT = MongoClient(mongo_uri, **(options or {}))
+        _CLIENT_PID = os.getpid()
+    return _CLIENT
+
+
+def encode_batch(docs: List[Dict[str, Any]]) -> List[RawBSONDocument]:
+    """Encode each document to BSON once; workers receive plain bytes."""
+    return [RawBSONDocument(encode(doc)) for doc in docs]
+
+
+def _insert_batch(
+    mongo_uri: str,
+    options: Optional[Dict[str, Any]],
+    db_name: str,
+    coll_name: str,
+    docs: List[RawBSONDocument],
+) -> int:
+    coll = get_client(mongo_uri, options)[db_name][coll_name]
+    coll.insert_many(docs, ordered=False)
+    # Raw documents get their _id from the server, so inserted_ids is empty
+    return len(docs)
+
+
+def insert_batches(
+    batches: Iterable[List[Dict[str, Any]]],
+    mongo_uri: str,
+    db_name: str,
+    coll_name: str,
+    workers: int = 1,
+    options: Optional[Dict[str, Any]] = None,
+) -> Iterator[Tuple[int, int]]:
+    """
+    Insert batches and yield (batch number, inserted count) as each completes.
+    With workers > 1 the inserts run in a process pool while the caller keeps
+    parsing; at most 2 * workers batches are in flight to bound memory.
+    Each batch is encoded before the next one is pulled, so producers may
+    refill the same list.
+    """
+    if workers <= 1:
+        for i, docs in enumerate(batches, start=1):
+            yield i, _insert_batch(
+                mongo_uri, options, db_name, coll_name, encode_batch(docs)
+            )
+        return
+
+    max_in_flight = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Dict[Future, int] = {}
+        for i, docs in enumerate(batches, start=1):
+            fut = pool.submit(
+                _insert_batch,
+                mongo_uri,
+                options,
+                db_name,
+                coll_name,
+                encode_batch(docs),
+            )
+            pending[fut] = i
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for finished in done:
+                    yield pending.pop(finished), finished.result()
+        for fut in as_completed(pending):
+            yield pending[fut], fut.result()
+
+
+async def insert_batches_async(
+    batches: Iterable[List[Dict[str, Any]]],
+    mongo_uri: str,
+    db_name: str,
+    coll_name: str,
+    options: Optional[Dict[str, Any]] = None,
+    consumers: int = ASYNC_CONSUMERS,
+) -> Tuple[int, int]:
+    """
+    Insert batches over one AsyncMongoClient while later batches are parsed.
+    Parsing and BSON encoding run in a worker thread that feeds a bounded
+    queue; `consumers` tasks drain it with concurrent insert_many calls and
+    log each batch as it lands. Returns (batches inserted, documents inserted).
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="Wire protocol compression")
+        client = AsyncMongoClient(
+            mongo_uri, maxPoolSize=ASYNC_MAX_POOL_SIZE, **(options or {})
+        )
+    coll = client[db_name][coll_name]
+    queue: asyncio.Queue = asyncio.Queue(maxsize=ASYNC_QUEUE_SIZE)
+    it = iter(batches)
+    done = total = 0
+
+    def next_encoded() -> Optional[List[RawBSONDocument]]:
+        # Encode before the next pull, since producers may refill the same list
+        docs = next(it, None)
+        return None if docs is None else encode_batch(docs)
+
+    async def produce() -> None:
+        i = 0
+        while True:
+            docs = await asyncio.to_thread(next_encoded)
+            if docs is None:
+                break
+            i += 1
+            await queue.put((i, docs))
+        for _ in range(consumers):
+            await queue.put(None)
+
+    async def consume() -> None:
+        nonlocal done, total
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            i, docs = item
+            await coll.insert_many(docs, ordered=False)
+            done += 1
+            total += len(docs)
+            logging.info("Batch %d inserted %d (total %d)", i, len(docs), total)
+
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(consume()) for _ in range(consumers)]
+    try:
+        # A failed insert surfaces here; the finally stops the other tasks
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await client.close()
+    return done, total
+
+
+def create_geo_index(coll: Any, geometry_field: str) -> None:
+    logging.info("Building 2dsphere index on '%s'", geometry_field)
+    started = time.perf_counter()
+    coll.create_index([(geometry_field, "2dsphere")])
+    logging.info("Index built in %.1fs", time.perf_counter() - started)
+
+
+# Cells coerce_cell(..., null_tokens=True) reads as None, in any case
+NULL_TOKENS = frozenset({"NULL", "N/A", "NA", "NONE"})
+# Characters of the inf/nan spellings float() accepts (besides signs/space)
+_NUMERIC_CHARS = frozenset("0123456789+-._eE,infatyINFATY \t\n\r\x0b\x0c")
+
+
+def _coerce_cell(v: Optional[str], null_tokens: bool = False) -> Any:
+    """
+    Type one CSV cell: empty -> None; plain digits without a leading zero ->
+    int; anything float() accepts once thousands commas are removed -> float;
+    otherwise the stripped string. With null_tokens, NULL_TOKENS -> None.
+    """
+    if v is None:
+        return None
+    v = v.strip()
+    if not v or (null_tokens and len(v) <= 4 and v.upper() in NULL_TOKENS):
+        return None
+    # float() only accepts strings that start with a digit, sign, "." or ","
+    # (all sort before ":"), spell inf/nan, or start non-ASCII; other text is
+    # returned here instead of paying for a failed float()
+    if (
+        v >= ":"
+        and v[0] < "\x80"
+        and (v[0] not in "iInN" or not _NUMERIC_CHARS.issuperset(v))
+    ):
+        return v
+    try:
+        if v.isdigit() and (len(v) == 1 or v[0] != "0"):
+            return int(v)
+        return float(v.replace(",", "") if "," in v else v)
+    except ValueError:
+        return v
+
+
+coerce_cell = fastcoerce.coerce_value if _HAS_FASTCOERCE else _coerce_cell
+
+
+# coerce_cell keeps only these as ints; other numeric strings become floats
+_PLAIN_INT = r"^(?:0|[1-9][0-9]*)$"
+
+
+def _arrow_column(col: "pa.Array", coerce: Callable[[Optional[str]], Any]) -> List[Any]:
+    """
+    Type one string column of a block the way `coerce` would: columns that are
+    all plain ints or all floats are cast in one step, anything else (text,
+    ints mixed with floats, thousands commas, ...) maps `coerce` over it.
+    """
+    if col.null_count == len(col):
+        return [None] * len(col)
+    is_int = pc.match_substring_regex(col, _PLAIN_INT)
+    try:
+        if pc.all(is_int).as_py():
+            return col.cast(pa.int64()).to_pylist()
+        if not pc.any(is_int).as_py():
+            return col.cast(pa.float64()).to_pylist()
+    except pa.ArrowInvalid:
+        pass  # text, or ints beyond int64
+    return [coerce(v) for v in col.to_pylist()]
+
+
+def read_arrow_csv(
+    csv_path: str,
+    headers: List[str],
+    coerce: Callable[[Optional[str]], Any],
+    encoding: str = "utf-8",
+    null_values: Sequence[str] = ("",),
+    batch_size: int = 5000,
+    raw_columns: Sequence[int] = (),
+) -> Iterator[Tuple[List[List[Any]], int]]:
+    """
+    Parse a CSV (or .csv.gz) with pyarrow, ARROW_BLOCK_SIZE bytes at a time, and
+    yield (columns, row_count) batches of at most `batch_size` rows; columns
+    are positional, in header order.
+
+    Every column is read as strings, so a block never fails on a type guessed
+    from an earlier one, and then typed per batch by _arrow_column; columns
+    whose index is in `raw_columns` stay strings. Cells in `null_values` are
+    None. Rows with too few or too many cells are padded / truncated to the
+    header like csv.reader rows are.
+    """
+    n = len(headers)
+    nulls = set(null_values)
+    raw = set(raw_columns)
+    bad_rows: List[str] = []
+
+    def keep_bad_row(row: Any) -> str:
+        # pyarrow can only skip or reject such a row: keep its text for later
+        bad_rows.append(row.text)
+        return "skip"
+
+    names = [str(i) for i in range(n)]
+    reader = pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(
+            block_size=ARROW_BLOCK_SIZE,
+            encoding=encoding,
+            column_names=names,
+            skip_rows=1,
+        ),
+        parse_options=pa_csv.ParseOptions(
+            newlines_in_values=True, invalid_row_handler=keep_bad_row
+        ),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in names},
+            strings_can_be_null=True,
+            null_values=list(null_values),
+        ),
+    )
+
+    def bad_row_batches() -> Iterator[Tuple[List[List[Any]], int]]:
+        texts = bad_rows[:]
+        del bad_rows[: len(texts)]
+        rows = [(next(csv.reader([t]), []) + [""] * n)[:n] for t in texts]
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start : start + batch_size]
+            columns = []
+            for i, values in enumerate(zip(*chunk)):
+                values = [None if v in nulls else v for v in values]
+                columns.append(values if i in raw else [coerce(v) for v in values])
+            yield columns, len(chunk)
+
+    for record_batch in reader:
+        for offset in range(0, record_batch.num_rows, batch_size):
+            chunk = record_batch.slice(offset, batch_size)
+            columns = [
+                col.to_pylist() if i in raw else _arrow_column(col, coerce)
+                for i, col in enumerate(chunk.columns)
+            ]
+            yield columns, chunk.num_rows
+        yield from bad_row_batches()
+    yield from bad_row_batches()
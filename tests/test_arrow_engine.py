@@ -0,0 +1,117 @@
+"""
+The --engine pyarrow readers must produce the same documents as the stdlib
+csv readers, also when the file spans several pyarrow blocks.
+
+  python -m unittest discover -s tests
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from mongo_ingest import HAS_PYARROW
+
+# Small enough that the test files below span many blocks
+TEST_BLOCK_SIZE = 256
+
+ROWS = 200
+
+
+def write_csv(directory: str, lines) -> str:
+    path = os.path.join(directory, "input.csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def csv_lines():
+    lines = ["id,count,sparse,name,note"]
+    for i in range(ROWS):
+        count = "2.5" if i == ROWS - 10 else str(i)  # a float late in an int column
+        sparse = "7" if i > ROWS // 2 else ""  # empty for the first blocks
+        name = "na" if i % 17 == 0 else f"lot {i}"
+        lines.append(f"{i},{count},{sparse},{name},x")
+    lines.append("900,1")  # short row
+    lines.append('901,2,3,"multi\nline",y,extra')  # long row
+    return lines
+
+
+def by_id(docs):
+    return sorted(docs, key=lambda d: d["id"])
+
+
+@unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+class ArrowCsvTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = mock.patch("mongo_ingest.ARROW_BLOCK_SIZE", TEST_BLOCK_SIZE)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read(self, reader, path):
+        import load_csv_to_mongo
+
+        docs = []
+        for columns, _ in reader(path, batch_size=64):
+            docs.extend(load_csv_to_mongo.columns_to_docs(columns))
+        return by_id(docs)
+
+    def test_matches_stdlib_across_blocks(self):
+        import load_csv_to_mongo
+
+        path = write_csv(self.tmp.name, csv_lines())
+        arrow_docs = self.read(load_csv_to_mongo.read_csv_columns_arrow, path)
+        stdlib_docs = self.read(load_csv_to_mongo.read_csv_columns, path)
+
+        self.assertEqual(len(arrow_docs), ROWS + 2)
+        self.assertEqual(arrow_docs, stdlib_docs)
+        # == alone does not tell 3 from 3.0
+        for a, s in zip(arrow_docs, stdlib_docs):
+            self.assertEqual(
+                [type(v) for v in a.values()], [type(v) for v in s.values()], a
+            )
+        self.assertEqual(arrow_docs[-2]["note"], None)
+        self.assertEqual(arrow_docs[-1]["name"], "multi\nline")
+
+
+@unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+class ArrowWktCsvTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = mock.patch("mongo_ingest.ARROW_BLOCK_SIZE", TEST_BLOCK_SIZE)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read(self, reader, path):
+        return by_id(
+            reader(
+                path, "the_geom", "geometry", "EPSG:4326", "EPSG:4326", batch_size=64
+            )
+        )
+
+    def test_matches_stdlib_across_blocks(self):
+        import load_wkt_csv_to_mongo
+
+        lines = ["id,the_geom,area,flag"]
+        for i in range(ROWS):
+            area = "n/a" if i % 13 == 0 else f"{i}.5"  # lowercase null token
+            flag = "" if i < ROWS // 2 else "None"
+            lines.append(f'{i},"POINT ({i % 90} {i % 45})",{area},{flag}')
+        lines.append('900,"POINT (1 2)"')  # short row
+        path = write_csv(self.tmp.name, lines)
+
+        arrow_docs = self.read(load_wkt_csv_to_mongo.yield_docs_from_csv_arrow, path)
+        stdlib_docs = self.read(load_wkt_csv_to_mongo.yield_docs_from_csv, path)
+
+        self.assertEqual(len(arrow_docs), ROWS + 1)
+        self.assertEqual(arrow_docs, stdlib_docs)
+        self.assertIsNone(arrow_docs[0]["area"])
+        self.assertIsInstance(arrow_docs[1]["area"], float)
+        self.assertIsNone(arrow_docs[-1]["flag"])
+
+
+if __name__ == "__main__":
+    unittest.main()
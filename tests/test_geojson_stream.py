@@ -0,0 +1,129 @@
+"""
+yield_docs_from_geojson_stream must accept the same inputs, and reject the
+same inputs, whether it streams with ijson or reads the whole document.
+
+  python -m unittest discover -s tests
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import load_geojson_to_mongo
+from mongo_ingest import open_maybe_gzip
+
+
+def feature(i, **props):
+    return {
+        "type": "Feature",
+        "id": i,
+        "geometry": {"type": "Point", "coordinates": [i, i + 0.5]},
+        "properties": {"n": i, **props},
+    }
+
+
+FEATURES = [feature(i) for i in range(3)]
+
+
+class GeoJsonStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, text, gz=False):
+        path = os.path.join(self.tmp.name, "input.geojson" + (".gz" if gz else ""))
+        with (gzip.open if gz else open)(path, "wt", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def load(self, path):
+        with open_maybe_gzip(path) as f:
+            return list(
+                load_geojson_to_mongo.yield_docs_from_geojson_stream(
+                    f, False, "geometry", True, True
+                )
+            )
+
+    def modes(self):
+        """Run the enclosed checks with and without the ijson streaming path."""
+        modes = [False]
+        if load_geojson_to_mongo._HAS_IJSON:
+            modes.append(True)
+        for streaming in modes:
+            with self.subTest(streaming=streaming), mock.patch.object(
+                load_geojson_to_mongo, "_HAS_IJSON", streaming
+            ):
+                yield
+
+    def assert_docs(self, docs, features):
+        self.assertEqual([d["_feature_id"] for d in docs], [f["id"] for f in features])
+        self.assertEqual(docs[0]["geometry"], features[0]["geometry"])
+        self.assertEqual(docs[0]["n"], features[0]["properties"]["n"])
+
+    def test_feature_collection(self):
+        for gz in (False, True):
+            path = self.write(
+                json.dumps({"type": "FeatureCollection", "features": FEATURES}), gz
+            )
+            for _ in self.modes():
+                self.assert_docs(self.load(path), FEATURES)
+
+    def test_feature_collection_with_type_last(self):
+        path = self.write(
+            json.dumps({"features": FEATURES, "type": "FeatureCollection"})
+        )
+        for _ in self.modes():
+            self.assert_docs(self.load(path), FEATURES)
+
+    def test_type_beyond_head_reads_whole_document(self):
+        path = self.write(
+            json.dumps(
+                {"name": "x" * 100, "type": "FeatureCollection", "features": FEATURES}
+            )
+        )
+        if not load_geojson_to_mongo._HAS_IJSON:
+            self.skipTest("ijson is not installed")
+        with mock.patch.object(load_geojson_to_mongo, "HEAD_BYTES", 64):
+            with self.assertLogs(level="WARNING"):
+                self.assert_docs(self.load(path), FEATURES)
+
+    def test_bare_feature_with_features_property(self):
+        feat = feature(7, features=[1, 2])
+        # "features" shows up before the Feature's own "type"
+        text = json.dumps(
+            {
+                "properties": feat["properties"],
+                "type": "Feature",
+                "id": 7,
+                "geometry": feat["geometry"],
+            }
+        )
+        for gz in (False, True):
+            path = self.write(text, gz)
+            for _ in self.modes():
+                docs = self.load(path)
+                self.assert_docs(docs, [feat])
+                self.assertEqual(docs[0]["features"], [1, 2])
+
+    def test_array_skips_non_features(self):
+        path = self.write(json.dumps(FEATURES + [{"type": "Point"}]))
+        for _ in self.modes():
+            self.assert_docs(self.load(path), FEATURES)
+
+    def test_wrong_type_is_rejected(self):
+        for obj in (
+            {"type": "Foo", "features": FEATURES},
+            {"features": FEATURES},
+            {"type": "FeatureCollection", "features": FEATURES + [{"type": "Point"}]},
+        ):
+            path = self.write(json.dumps(obj), gz=True)
+            for _ in self.modes():
+                with self.assertRaises(ValueError):
+                    self.load(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
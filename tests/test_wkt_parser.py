@@ -0,0 +1,58 @@
+"""
+fast_wkt_to_geojson must agree with shapely on the WKT it accepts and return
+None (so shapely decides) for everything else.
+
+  python -m unittest discover -s tests
+"""
+
+import unittest
+
+import shapely
+from shapely.geometry import mapping
+
+from load_wkt_csv_to_mongo import fast_wkt_to_geojson
+
+VALID = [
+    "POINT (1 2)",
+    "point(-73.95 40.7)",
+    "POINT (1e3 -2.5E-1)",
+    "POLYGON ((0 0, 1 0, 1 1, 0 0))",
+    " POLYGON (( 0 0 ,1 0, 1 1,0 1, 0 0 ) , (0.1 0.1, 0.2 0.1, 0.2 0.2, 0.1 0.1))",
+    "MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((2 2, 3 2, 3 3, 2 2), (2.1 2.1, 2.2 2.1, 2.2 2.2, 2.1 2.1)))",
+]
+
+REJECTED = [
+    # malformed, or valid for shapely but not as a GeoJSON position / ring
+    "POINT (1 2, 3 4)",
+    "POINT ()",
+    "POINT (1)",
+    "POINT (1 2",
+    "POINT EMPTY",
+    "POINT Z (1 2 3)",
+    "POLYGON ((0 0, 1 0, 1 1))",
+    "POLYGON ((0 0, 1 0, 1 1, 0 1))",
+    "POLYGON ((0 0, 1 0, 0 0))",
+    "POLYGON ((0 0, 1 0, 1 1, 0 0), (0.1 0.1, 0.2 0.1, 0.2 0.2))",
+    "MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((2 2, 3 2, 3 3)))",
+    "POLYGON ((0 0, 1 0, 1 x, 0 0))",
+    "LINESTRING (0 0, 1 1)",
+    "GEOMETRYCOLLECTION (POINT (1 2))",
+]
+
+
+class FastWktTest(unittest.TestCase):
+    def test_matches_shapely(self):
+        for wkt in VALID:
+            with self.subTest(wkt=wkt):
+                self.assertEqual(
+                    fast_wkt_to_geojson(wkt), mapping(shapely.from_wkt(wkt))
+                )
+
+    def test_rejects_what_it_cannot_convert_exactly(self):
+        for wkt in REJECTED:
+            with self.subTest(wkt=wkt):
+                self.assertIsNone(fast_wkt_to_geojson(wkt))
+
+
+if __name__ == "__main__":
+    unittest.main()